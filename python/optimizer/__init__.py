@@ -3,6 +3,7 @@
 from .bitrate_predictor import BitratePredictor, NetworkMetrics
 from .quality_optimizer import QualityOptimizer
 from .data_collector import MetricsCollector
+from .metrics import Metrics
 from .trainer import Trainer
 
 __all__ = [
@@ -10,5 +11,6 @@ __all__ = [
     'NetworkMetrics',
     'QualityOptimizer',
     'MetricsCollector',
+    'Metrics',
     'Trainer',
 ]
\ No newline at end of file
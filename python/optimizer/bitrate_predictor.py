@@ -1,11 +1,22 @@
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import numpy as np
 from typing import List, Tuple
 import logging
+import time
+
+from .jit import warmup
 
 logger = logging.getLogger(__name__)
 
+# Reciprocal normalization scales for the NetworkMetrics history columns:
+# latency, jitter, packet loss, bandwidth, frame complexity, bitrate
+_BITRATE_SCALE = np.array(
+    [1 / 200.0, 1 / 50.0, 1.0, 1 / 50000.0, 1.0, 1 / 20000.0],
+    dtype=np.float32
+)
+
 
 class BitratePredictor(nn.Module):
     """
@@ -45,21 +56,25 @@ class BitratePredictor(nn.Module):
             dropout=dropout if num_layers > 1 else 0,
         )
 
-        # Fully connected layers
-        self.fc = nn.Sequential(
-            nn.Linear(hidden_size, 64),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(64, 32),
-            nn.ReLU(),
-            nn.Dropout(dropout),
-            nn.Linear(32, 1),
-            nn.Sigmoid()  # Output 0-1
-        )
+        # Fully connected layers, dropout is applied functionally so it
+        # vanishes from frozen inference graphs
+        self.dropout = dropout
+        self.l1 = nn.Linear(hidden_size, 64)
+        self.l2 = nn.Linear(64, 32)
+        self.l3 = nn.Linear(32, 1)
+
+        # Accept checkpoints saved with the former nn.Sequential head
+        self._register_load_state_dict_pre_hook(self._upgrade_state_dict)
 
         # Initialize weights
         self._init_weights()
 
+        # Frozen TorchScript copy used by predict_bitrate when compiled
+        self._compiled = None
+
+        # Reused input storage for predict_bitrates, grown on demand
+        self._in_buf = torch.empty(0, 0, input_size)
+
     def _init_weights(self):
         """Initialize network weights"""
         for name, param in self.named_parameters():
@@ -68,6 +83,25 @@ class BitratePredictor(nn.Module):
             elif 'bias' in name:
                 nn.init.constant_(param, 0.0)
 
+    @staticmethod
+    def _upgrade_state_dict(state_dict, prefix, *args):
+        """Rename fc.{0,3,6} parameters of older checkpoints to l1-l3"""
+        for index, layer in (('0', 'l1'), ('3', 'l2'), ('6', 'l3')):
+            for param in ('weight', 'bias'):
+                old_key = f"{prefix}fc.{index}.{param}"
+                if old_key in state_dict:
+                    state_dict[f"{prefix}{layer}.{param}"] = state_dict.pop(old_key)
+
+    def forward_fc(self, x: torch.Tensor) -> torch.Tensor:
+        """Fully connected head, (batch_size, hidden_size) -> (batch_size, 1)"""
+        x = F.relu_(self.l1(x))
+        x = F.dropout(x, self.dropout, self.training)
+        x = F.relu_(self.l2(x))
+        x = F.dropout(x, self.dropout, self.training)
+
+        # Output 0-1
+        return torch.sigmoid(self.l3(x))
+
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """
         Forward pass
@@ -79,16 +113,35 @@ class BitratePredictor(nn.Module):
             predictions: (batch_size, 1)
         """
         # LSTM forward pass
-        lstm_out, (h_n, c_n) = self.lstm(x)
+        _, (h_n, _) = self.lstm(x)
 
-        # Use last hidden state
-        last_hidden = lstm_out[:, -1, :]
+        # Use last hidden state of the top layer, (num_layers, batch, hidden)
+        last_hidden = h_n[-1]
 
         # Fully connected layers
-        output = self.fc(last_hidden)
+        output = self.forward_fc(last_hidden)
 
         return output
 
+    def compile_for_inference(self, sequence_length: int = 30):
+        """
+        Script, freeze and optimize a copy of the network for predict_bitrate
+
+        The compiled copy holds constant weights, so it must be rebuilt after
+        any further training.
+
+        Args:
+            sequence_length: Sequence length used for warmup calls
+        """
+        self.eval()
+        scripted = torch.jit.script(self)
+        compiled = torch.jit.optimize_for_inference(torch.jit.freeze(scripted))
+
+        warmup(compiled, torch.zeros(1, sequence_length, self.input_size))
+
+        # Bypass submodule registration to keep it out of state_dict()
+        object.__setattr__(self, '_compiled', compiled)
+
     def predict_bitrate(
             self,
             features: np.ndarray,
@@ -106,36 +159,86 @@ class BitratePredictor(nn.Module):
         Returns:
             Predicted bitrate in kbps
         """
+        # Add batch dimension
+        return self.predict_bitrates(
+            features[None],
+            min_bitrate=min_bitrate,
+            max_bitrate=max_bitrate
+        )[0]
+
+    def predict_bitrates(
+            self,
+            features: np.ndarray,
+            min_bitrate: int = 2000,
+            max_bitrate: int = 20000
+    ) -> List[int]:
+        """
+        Predict optimal bitrates for a batch of metric windows in one pass
+
+        Doesn't disable autograd itself, call under torch.inference_mode()
+        to skip graph recording.
+
+        Args:
+            features: Network metrics (batch_size, sequence_length, input_size)
+            min_bitrate: Minimum bitrate in kbps
+            max_bitrate: Maximum bitrate in kbps
+
+        Returns:
+            Predicted bitrate in kbps for each window
+        """
         self.eval()
-        with torch.no_grad():
-            # Add batch dimension
-            x = torch.FloatTensor(features).unsqueeze(0)
+        model = self._compiled if self._compiled is not None else self
+        x = self._input_tensor(np.asarray(features))
+
+        # Predict, converting on the host once for the whole batch
+        normalized = model(x).squeeze(1).tolist()
 
-            # Predict
-            normalized = self.forward(x).item()
+        # Scale to bitrate range
+        return [
+            int(min_bitrate + (n * (max_bitrate - min_bitrate)))
+            for n in normalized
+        ]
 
-            # Scale to bitrate range
-            bitrate = min_bitrate + (normalized * (max_bitrate - min_bitrate))
+    def _input_tensor(self, features: np.ndarray) -> torch.Tensor:
+        """Copy features into the reused input buffer, converting to float32"""
+        batch_size, sequence_length, input_size = features.shape
 
-            return int(bitrate)
+        # Reallocate only when the window length changes or batch grows
+        buf = self._in_buf
+        if buf.shape[0] < batch_size or buf.shape[1:] != (sequence_length, input_size):
+            # Allocate a normal tensor even under inference mode, so the
+            # buffer stays writable from outside it
+            with torch.inference_mode(False):
+                buf = torch.empty(batch_size, sequence_length, input_size)
+            self._in_buf = buf
+
+        x = buf[:batch_size]
+        x.copy_(torch.from_numpy(features))
+        return x
 
 
 class NetworkMetrics:
     """Collect and process network metrics"""
 
+    # Column order of the history buffer
+    NUM_FIELDS = 6
+
     def __init__(self, window_size: int = 30):
         self.window_size = window_size
 
-        # Metric histories
-        self.latency_ms = []
-        self.jitter_ms = []
-        self.packet_loss = []
-        self.bandwidth_kbps = []
-        self.frame_complexity = []
-        self.bitrate_kbps = []
+        # Metric history ring buffer, one row per sample:
+        # latency, jitter, packet loss, bandwidth, frame complexity, bitrate
+        self.buf = np.zeros((window_size, self.NUM_FIELDS), dtype=np.float32)
 
         # Timestamps
-        self.timestamps = []
+        self.ts = np.zeros(window_size, dtype=np.float64)
+
+        # Next write position and number of valid samples
+        self._i = 0
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
 
     def add_sample(
             self,
@@ -147,25 +250,33 @@ class NetworkMetrics:
             bitrate_kbps: float = 0.0
     ):
         """Add a new metrics sample"""
-        import time
-
-        self.latency_ms.append(latency_ms)
-        self.jitter_ms.append(jitter_ms)
-        self.packet_loss.append(packet_loss)
-        self.bandwidth_kbps.append(bandwidth_kbps)
-        self.frame_complexity.append(frame_complexity)
-        self.bitrate_kbps.append(bitrate_kbps)
-        self.timestamps.append(time.time())
-
-        # Keep only recent history
-        if len(self.latency_ms) > self.window_size:
-            self.latency_ms.pop(0)
-            self.jitter_ms.pop(0)
-            self.packet_loss.pop(0)
-            self.bandwidth_kbps.pop(0)
-            self.frame_complexity.pop(0)
-            self.bitrate_kbps.pop(0)
-            self.timestamps.pop(0)
+        self.buf[self._i] = (
+            latency_ms,
+            jitter_ms,
+            packet_loss,
+            bandwidth_kbps,
+            frame_complexity,
+            bitrate_kbps,
+        )
+        self.ts[self._i] = time.time()
+
+        # Overwrite the oldest sample once the window is full
+        self._i = (self._i + 1) % self.window_size
+        if self._n < self.window_size:
+            self._n += 1
+
+    def get_history(self) -> np.ndarray:
+        """
+        Get recorded samples in chronological order
+
+        Returns:
+            history: (num_samples, 6) numpy array
+        """
+        if self._n < self.window_size:
+            return self.buf[:self._n]
+
+        # Buffer has wrapped, oldest sample sits at the write position
+        return np.concatenate((self.buf[self._i:], self.buf[:self._i]))
 
     def get_features(self) -> np.ndarray:
         """
@@ -174,25 +285,43 @@ class NetworkMetrics:
         Returns:
             features: (sequence_length, 10) numpy array
         """
-        if not self.latency_ms:
+        if not self._n:
             return np.zeros((1, 10))
 
-        # Stack time series features
-        sequence_length = len(self.latency_ms)
-        features = np.zeros((sequence_length, 10))
-
-        for i in range(sequence_length):
-            features[i] = [
-                self.latency_ms[i] / 200.0,  # Normalize by max expected
-                self.jitter_ms[i] / 50.0,
-                self.packet_loss[i],
-                self.bandwidth_kbps[i] / 50000.0,
-                self.frame_complexity[i],
-                np.mean(self.latency_ms[:i+1]) / 200.0 if i > 0 else 0,
-                np.std(self.latency_ms[:i+1]) / 50.0 if i > 1 else 0,
-                np.mean(self.jitter_ms[:i+1]) / 50.0 if i > 0 else 0,
-                np.mean(self.packet_loss[:i+1]) if i > 0 else 0,
-                self.bitrate_kbps[i] / 20000.0 if self.bitrate_kbps[i] > 0 else 0.5,
-                ]
-
-        return features
\ No newline at end of file
+        return window_features(self.get_history())
+
+
+def window_features(history: np.ndarray) -> np.ndarray:
+    """
+    Featurize metric windows, batched over any leading dimensions
+
+    Args:
+        history: (..., sequence_length, 6) samples in chronological order
+
+    Returns:
+        features: (..., sequence_length, 10) float64 array
+    """
+    # Accumulate in float64 so prefix variances stay well conditioned
+    history = history.astype(np.float64)
+    sequence_length = history.shape[-2]
+
+    # Running statistics over the growing prefix of each field
+    counts = np.arange(1, sequence_length + 1)[:, None]
+    prefix_mean = np.cumsum(history, axis=-2) / counts
+    prefix_var = np.cumsum(history ** 2, axis=-2) / counts - prefix_mean ** 2
+    latency_std = np.sqrt(np.clip(prefix_var[..., 0], 0.0, None))
+
+    # Normalize raw fields and prefix means with one broadcast each
+    scaled = history * _BITRATE_SCALE
+    scaled_mean = prefix_mean * _BITRATE_SCALE
+
+    # Stack time series features
+    features = np.zeros(history.shape[:-1] + (10,))
+    features[..., :5] = scaled[..., :5]
+    features[..., 1:, 5] = scaled_mean[..., 1:, 0]
+    features[..., 2:, 6] = latency_std[..., 2:] * _BITRATE_SCALE[1]
+    features[..., 1:, 7] = scaled_mean[..., 1:, 1]
+    features[..., 1:, 8] = scaled_mean[..., 1:, 2]
+    features[..., 9] = np.where(history[..., 5] > 0, scaled[..., 5], 0.5)
+
+    return features
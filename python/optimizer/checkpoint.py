@@ -0,0 +1,22 @@
+import torch
+from typing import Any
+
+
+def load_checkpoint(path: str) -> Any:
+    """
+    Load a checkpoint onto the CPU without unpickling arbitrary objects
+
+    Tensors are memory-mapped from the file instead of read into RAM up
+    front, which keeps cold start fast.
+
+    Args:
+        path: Path to a checkpoint written by torch.save
+
+    Returns:
+        The loaded state dict or checkpoint dict
+    """
+    try:
+        return torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+    except TypeError:
+        # PyTorch without the mmap argument
+        return torch.load(path, map_location='cpu', weights_only=True)
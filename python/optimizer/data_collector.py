@@ -1,9 +1,11 @@
-import json
 import asyncio
+import msgspec
 import websockets
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
+from .metrics import Metrics, metrics_decoder, metrics_encoder
+
 logger = logging.getLogger(__name__)
 
 
@@ -14,33 +16,63 @@ class MetricsCollector:
         self.server_url = server_url
         self.metrics_history = []
 
+        # Messages as received, so saved history keeps fields Metrics skips
+        self.raw_history = []
+
     async def connect(self):
         """Connect to metrics stream"""
-        self.websocket = await websockets.connect(self.server_url)
+        self.websocket = await websockets.connect(
+            self.server_url,
+            compression=None,
+            max_size=2 ** 20,
+            max_queue=1024
+        )
         logger.info(f"Connected to metrics stream: {self.server_url}")
 
-    async def collect(self) -> Dict:
-        """Receive metrics from server"""
+    async def collect(self) -> Optional[Metrics]:
+        """
+        Receive metrics from server
+
+        Returns:
+            Decoded metrics, or None for a message that failed to decode
+
+        Raises:
+            websockets.ConnectionClosed: The server closed the stream
+        """
         try:
             message = await self.websocket.recv()
-            metrics = json.loads(message)
+            metrics = metrics_decoder.decode(message)
             self.metrics_history.append(metrics)
+            self.raw_history.append(
+                message.encode() if isinstance(message, str) else message
+            )
             return metrics
+        except websockets.ConnectionClosed:
+            raise
         except Exception as e:
             logger.error(f"Error collecting metrics: {e}")
-            return {}
+            return None
+
+    async def send(self, recommendations: List[Dict]):
+        """Send a batch of recommendations to server as one JSON array frame"""
+        try:
+            # str goes out as a text frame, bytes would be sent as binary
+            await self.websocket.send(metrics_encoder.encode(recommendations).decode())
+        except Exception as e:
+            logger.error(f"Error sending recommendations: {e}")
 
     async def close(self):
         """Close connection"""
         if hasattr(self, 'websocket'):
             await self.websocket.close()
 
-    def get_history(self, window: int = 100) -> List[Dict]:
+    def get_history(self, window: int = 100) -> List[Metrics]:
         """Get recent metrics history"""
         return self.metrics_history[-window:]
 
     def save_history(self, path: str):
-        """Save metrics history to file"""
-        with open(path, 'w') as f:
-            json.dump(self.metrics_history, f, indent=2)
+        """Save the received metrics messages to file, unknown fields included"""
+        with open(path, 'wb') as f:
+            encoded = b'[' + b','.join(self.raw_history) + b']'
+            f.write(msgspec.json.format(encoded, indent=2))
         logger.info(f"Saved {len(self.metrics_history)} metrics to {path}")
\ No newline at end of file
@@ -0,0 +1,167 @@
+import queue
+import threading
+import torch
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+Batch = Tuple[torch.Tensor, ...]
+
+
+def to_device(batch: Sequence[torch.Tensor], device: torch.device) -> Batch:
+    """Issue non-blocking copies of a host batch to the device"""
+    return tuple(t.to(device, non_blocking=True) for t in batch)
+
+
+class PinnedStaging:
+    """
+    Double-buffered pinned host staging for fixed-shape batches.
+
+    Batches are copied into persistent page-locked buffers and sent to the
+    device from there, so no pinned memory is allocated per batch. Buffers
+    are used round-robin, and one is only refilled after its previous
+    host-to-device copy has finished.
+    """
+
+    def __init__(self, device: torch.device, num_buffers: int = 2):
+        """
+        Args:
+            device: Device batches are copied to
+            num_buffers: Number of staging buffers to rotate through
+        """
+        self.device = device
+        self.num_buffers = num_buffers
+
+        # Allocated from the first batch's shapes and dtypes
+        self.buffers: List[Batch] = []
+        self.events: List[Optional[torch.cuda.Event]] = [None] * num_buffers
+        self._i = 0
+
+    def _allocate(self, example: Sequence[torch.Tensor]):
+        self.buffers = [
+            tuple(
+                torch.empty(t.shape, dtype=t.dtype, pin_memory=True)
+                for t in example
+            )
+            for _ in range(self.num_buffers)
+        ]
+
+    def to_device(self, batch: Sequence[torch.Tensor]) -> Batch:
+        """Stage a host batch and issue non-blocking copies to the device"""
+        if not self.buffers:
+            self._allocate(batch)
+
+        i = self._i
+        self._i = (i + 1) % self.num_buffers
+
+        # Wait for the copy still reading from this buffer
+        if self.events[i] is not None:
+            self.events[i].synchronize()
+
+        staged = self.buffers[i]
+        for dst, src in zip(staged, batch):
+            dst.copy_(src)
+
+        on_device = to_device(staged, self.device)
+
+        # Recorded on the current stream, which issued the copies
+        event = torch.cuda.Event()
+        event.record()
+        self.events[i] = event
+
+        return on_device
+
+
+class CUDAPrefetcher:
+    """
+    Iterate host batches with assembly and transfer overlapping compute.
+
+    A background thread keeps up to `depth` batches pulled from the
+    underlying iterable, and each batch is copied to the device on a side
+    CUDA stream while the previous one is being consumed.
+    """
+
+    # Queue marker for an exhausted source
+    _END = object()
+
+    def __init__(
+            self,
+            batches: Iterable[Sequence[torch.Tensor]],
+            device: torch.device,
+            depth: int = 2,
+            transfer: Optional[Callable[[Sequence[torch.Tensor]], Batch]] = None
+    ):
+        """
+        Args:
+            batches: Host batches, typically a DataLoader
+            device: CUDA device batches are copied to
+            depth: Host batches kept ready on the background thread
+            transfer: Host-to-device copy, defaults to to_device()
+        """
+        self.batches = batches
+        self.device = device
+        self.depth = depth
+        self.transfer = transfer or (lambda batch: to_device(batch, device))
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def _produce(self, ready: queue.Queue, stop: threading.Event):
+        """Background thread: pull host batches until exhausted or stopped"""
+        try:
+            for batch in self.batches:
+                while not stop.is_set():
+                    try:
+                        ready.put(batch, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            item = self._END
+        except Exception as e:
+            item = e
+
+        while not stop.is_set():
+            try:
+                ready.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _preload(self, ready: queue.Queue, stream: torch.cuda.Stream) -> Optional[Batch]:
+        """Take the next host batch and start its copy on the side stream"""
+        item = ready.get()
+        if item is self._END:
+            return None
+        if isinstance(item, Exception):
+            raise item
+
+        with torch.cuda.stream(stream):
+            return self.transfer(item)
+
+    def __iter__(self) -> Iterator[Batch]:
+        ready: queue.Queue = queue.Queue(maxsize=self.depth)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce,
+            args=(ready, stop),
+            daemon=True
+        )
+        producer.start()
+
+        stream = torch.cuda.Stream(self.device)
+        try:
+            next_batch = self._preload(ready, stream)
+            while next_batch is not None:
+                # Make compute wait for the copy, and keep the side-stream
+                # allocations alive until compute is done with them
+                current = torch.cuda.current_stream(self.device)
+                current.wait_stream(stream)
+                for t in next_batch:
+                    t.record_stream(current)
+
+                batch = next_batch
+                next_batch = self._preload(ready, stream)
+                yield batch
+        finally:
+            stop.set()
+            producer.join()
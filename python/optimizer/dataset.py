@@ -0,0 +1,163 @@
+import json
+import logging
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from .bitrate_predictor import window_features
+
+logger = logging.getLogger(__name__)
+
+# Windows featurized per vectorized pass, bounds the float64 temporaries
+_CHUNK_WINDOWS = 16384
+
+# Raw columns feeding NetworkMetrics, with defaults matching Metrics
+_COLUMNS = (
+    ('latency_ms', 30),
+    ('jitter_ms', 5),
+    ('packet_loss', 0.0),
+    ('bandwidth_kbps', 15000),
+    ('complexity', 0.5),
+    ('bitrate_kbps', 10000),
+)
+
+# Bitrate range the predictor's 0-1 output is scaled to
+MIN_BITRATE = 2000
+MAX_BITRATE = 20000
+
+
+def cache_dir(dataset_path: str, sequence_length: int) -> Path:
+    """Directory holding the converted arrays for a dataset"""
+    # Keep the extension so d.csv and d.json get separate caches
+    path = Path(dataset_path)
+    return path.with_name(f"{path.name}.cache") / f"seq{sequence_length}"
+
+
+def _source_stamp(dataset_path: str) -> dict:
+    """Size and mtime identifying the raw file a cache was built from"""
+    stat = Path(dataset_path).stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _cache_is_fresh(cache: Path, dataset_path: str) -> bool:
+    """Whether cached arrays exist and match the current raw file"""
+    stamp_path = cache / 'source.json'
+    if not all(p.exists() for p in (cache / 'X.npy', cache / 'y.npy', stamp_path)):
+        return False
+    try:
+        return json.loads(stamp_path.read_text()) == _source_stamp(dataset_path)
+    except ValueError:
+        return False
+
+
+def read_raw(dataset_path: str) -> pd.DataFrame:
+    """Read a CSV or JSON (list of records) metrics dataset"""
+    path = Path(dataset_path)
+    if path.suffix == '.csv':
+        return pd.read_csv(path)
+    return pd.read_json(path)
+
+
+def build_arrays(
+        df: pd.DataFrame,
+        sequence_length: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Turn raw metrics into training windows
+
+    Each window is featurized the way NetworkMetrics does it online, in
+    vectorized chunks over strided views of the raw columns. The
+    label is the window's last target_bitrate_kbps when the dataset has it,
+    otherwise the bandwidth/loss/latency heuristic of the synthetic data.
+
+    Missing columns and missing values (blank CSV cells, JSON records
+    without the key) take the Metrics default.
+
+    Returns:
+        X: (num_windows, sequence_length, 10) float32
+        y: (num_windows,) float32 normalized bitrate
+    """
+    raw = np.stack([
+        df[column].fillna(default).to_numpy(np.float32) if column in df else
+        np.full(len(df), default, dtype=np.float32)
+        for column, default in _COLUMNS
+    ], axis=1)
+
+    # A single NaN spreads through every window's prefix statistics
+    if not np.isfinite(raw).all():
+        rows = np.flatnonzero(~np.isfinite(raw).all(axis=1))
+        raise ValueError(
+            f"Dataset has non-finite metrics in {len(rows)} rows "
+            f"(first at row {rows[0]})"
+        )
+
+    num_windows = len(raw) - sequence_length + 1
+    if num_windows < 1:
+        raise ValueError(
+            f"Dataset has {len(raw)} samples, need at least {sequence_length}"
+        )
+
+    # (num_windows, sequence_length, 6) view, no copy of the samples
+    windows = np.lib.stride_tricks.sliding_window_view(
+        raw, sequence_length, axis=0
+    ).transpose(0, 2, 1)
+
+    X = np.empty((num_windows, sequence_length, 10), dtype=np.float32)
+    for start in range(0, num_windows, _CHUNK_WINDOWS):
+        end = start + _CHUNK_WINDOWS
+        X[start:end] = window_features(windows[start:end])
+
+    last = raw[sequence_length - 1:]
+    if 'target_bitrate_kbps' in df:
+        target = df['target_bitrate_kbps'].to_numpy(np.float32)[sequence_length - 1:]
+        if not np.isfinite(target).all():
+            raise ValueError(
+                f"Dataset has {np.count_nonzero(~np.isfinite(target))} windows "
+                f"with a missing or non-finite target_bitrate_kbps"
+            )
+        y = (target - MIN_BITRATE) / (MAX_BITRATE - MIN_BITRATE)
+    else:
+        latency, loss, bandwidth = last[:, 0], last[:, 2], last[:, 3]
+        y = (bandwidth / 50000.0) * (1 - loss * 2) * (1 - latency / 400.0)
+
+    return X, np.clip(y, 0.0, 1.0).astype(np.float32)
+
+
+def load_dataset(
+        dataset_path: str,
+        sequence_length: int = 30,
+        rebuild_cache: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Load training arrays, converting the raw dataset on first use
+
+    The converted arrays are cached as .npy files next to the dataset and
+    memory-mapped on later loads, so the raw file is only parsed once. The
+    cache is rebuilt when the raw file's size or mtime changes.
+
+    Args:
+        dataset_path: Path to a CSV or JSON metrics dataset
+        sequence_length: Samples per training window
+        rebuild_cache: Convert again even if a cache exists
+
+    Returns:
+        X: (num_windows, sequence_length, 10) float32
+        y: (num_windows,) float32
+    """
+    cache = cache_dir(dataset_path, sequence_length)
+    x_path, y_path = cache / 'X.npy', cache / 'y.npy'
+
+    if rebuild_cache or not _cache_is_fresh(cache, dataset_path):
+        logger.info("Converting %s into %s", dataset_path, cache)
+        stamp = _source_stamp(dataset_path)
+        X, y = build_arrays(read_raw(dataset_path), sequence_length)
+        cache.mkdir(parents=True, exist_ok=True)
+        np.save(x_path, X)
+        np.save(y_path, y)
+        # Written last, an interrupted conversion leaves the cache stale
+        (cache / 'source.json').write_text(json.dumps(stamp))
+
+    # Copy-on-write maps stay writable, which torch.from_numpy expects
+    return np.load(x_path, mmap_mode='c'), np.load(y_path, mmap_mode='c')
@@ -0,0 +1,20 @@
+import torch
+
+
+def warmup(module: torch.jit.ScriptModule, example: torch.Tensor, calls: int = 2):
+    """
+    Run a TorchScript module on an example input before it serves requests
+
+    The profiling executor specializes the graph during the first calls,
+    and frozen modules are also fused then, so keeping these calls out of
+    the hot path (and out of latency measurements) avoids slow first
+    predictions.
+
+    Args:
+        module: Scripted or traced module
+        example: Input with the shape the module will serve
+        calls: Number of warmup calls
+    """
+    with torch.inference_mode():
+        for _ in range(calls):
+            module(example)
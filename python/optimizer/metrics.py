@@ -0,0 +1,44 @@
+from typing import Union
+
+import msgspec
+
+
+class Metrics(msgspec.Struct):
+    """
+    Metrics sample reported by the streaming server.
+
+    Fields missing from a message take the defaults below; unknown fields
+    are ignored.
+    """
+
+    # Timing
+    # Echoed back in recommendations, keep integer timestamps integers
+    timestamp: Union[int, float] = 0
+    fps: float = 60
+    frame_time_ms: float = 16
+    encode_time_ms: float = 5
+    frame_drops: float = 0
+
+    # Network
+    latency_ms: float = 30
+    jitter_ms: float = 5
+    packet_loss: float = 0.0
+    bandwidth_kbps: float = 15000
+    bitrate_kbps: float = 10000
+    buffer_occupancy: float = 0.5
+
+    # Resources
+    cpu_usage: float = 0.5
+    gpu_usage: float = 0.5
+    memory_usage: float = 0.5
+
+    # Content and quality
+    resolution: str = '1920x1080'
+    quality_score: float = 0.9
+    complexity: float = 0.5
+    complexity_score: float = 0.5
+
+
+# Shared codecs, msgspec decoders and encoders are reusable and thread-safe
+metrics_decoder = msgspec.json.Decoder(Metrics)
+metrics_encoder = msgspec.json.Encoder()
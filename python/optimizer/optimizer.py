@@ -5,14 +5,24 @@ import logging
 import signal
 import sys
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import torch
+import torch.nn as nn
 import numpy as np
 
 from .bitrate_predictor import BitratePredictor, NetworkMetrics
+from .checkpoint import load_checkpoint
 from .quality_optimizer import QualityOptimizer
 from .data_collector import MetricsCollector
+from .metrics import Metrics
+
+# Faster event loop where available (not supported on Windows)
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:
+    pass
 
 logging.basicConfig(
     level=logging.INFO,
@@ -20,6 +30,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Recommendation per QualityOptimizer action: (action, reason, target).
+# Stepped actions carry (Metrics field, target key, step, limit) as target.
+_ACTIONS = (
+    ('increase_resolution', 'Network stable, can increase quality', None),
+    ('decrease_resolution', 'Network congested, reduce resolution', None),
+    ('increase_fps', '', ('fps', 'target_fps', 10, 120)),
+    ('decrease_fps', '', ('fps', 'target_fps', -10, 30)),
+    ('increase_bitrate', '', ('bitrate_kbps', 'target_bitrate', 1000, 20000)),
+    ('decrease_bitrate', '', ('bitrate_kbps', 'target_bitrate', -1000, 2000)),
+    ('use_faster_preset', 'CPU overloaded', None),
+    ('use_slower_preset', 'CPU underutilized, can improve quality', None),
+    ('no_change', '', None),
+)
+_NO_CHANGE = 8
+
+# Metrics held between the socket and the optimization loop, once full the
+# receiver stops reading and the websocket's own queue applies backpressure
+_METRICS_QUEUE_SIZE = 1024
+
 
 class StreamingOptimizer:
     """
@@ -31,12 +60,29 @@ class StreamingOptimizer:
             self,
             server_url: str = "ws://localhost:8080/metrics",
             models_dir: str = "models",
-            enable_training: bool = False
+            enable_training: bool = False,
+            max_batch_size: int = 32,
+            send_batch_size: int = 10
     ):
         self.server_url = server_url
         self.models_dir = Path(models_dir)
         self.enable_training = enable_training
 
+        # Most queued metrics messages handled per bitrate prediction pass
+        self.max_batch_size = max_batch_size
+
+        # Most recommendations sent in a single frame
+        self.send_batch_size = send_batch_size
+
+        # Threading only adds dispatch overhead and contention for models
+        # this small, quantized kernels in particular
+        torch.set_num_threads(1)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set before any inter-op parallel work has started
+            pass
+
         # Initialize models
         self.bitrate_model = BitratePredictor()
         self.quality_model = QualityOptimizer()
@@ -45,12 +91,20 @@ class StreamingOptimizer:
         # Load pre-trained models if available
         self._load_models()
 
-        # Metrics collector
+        # Quantized and frozen models can't be trained, keep FP32 eager
+        # models when training
+        if not self.enable_training:
+            self._quantize_models()
+            self._compile_models()
+
+        # Metrics collector, feeds the optimization loop through a queue
+        # created by run() on the running event loop
         self.collector = MetricsCollector(server_url)
+        self.metrics_queue: Optional[asyncio.Queue] = None
 
         # State tracking
-        self.current_metrics = {}
-        self.previous_metrics = {}
+        self.current_metrics: Optional[Metrics] = None
+        self.previous_metrics: Optional[Metrics] = None
         self.recommendations_sent = 0
         self.running = False
 
@@ -62,7 +116,7 @@ class StreamingOptimizer:
         if bitrate_path.exists():
             try:
                 self.bitrate_model.load_state_dict(
-                    torch.load(bitrate_path, map_location='cpu')
+                    load_checkpoint(str(bitrate_path))
                 )
                 logger.info(f"Loaded bitrate model from {bitrate_path}")
             except Exception as e:
@@ -75,6 +129,35 @@ class StreamingOptimizer:
             except Exception as e:
                 logger.warning(f"Failed to load quality model: {e}")
 
+    def _quantize_models(self):
+        """Replace the bitrate model with a dynamic INT8 copy for inference"""
+        try:
+            self.bitrate_model.eval()
+            self.bitrate_model = torch.quantization.quantize_dynamic(
+                self.bitrate_model,
+                {nn.LSTM, nn.Linear},
+                dtype=torch.qint8
+            )
+            logger.info("Quantized bitrate model to INT8")
+        except Exception as e:
+            logger.warning(f"Failed to quantize bitrate model: {e}")
+
+    def _compile_models(self):
+        """Compile frozen TorchScript copies of both models for inference"""
+        try:
+            self.bitrate_model.compile_for_inference(
+                sequence_length=self.network_metrics.window_size
+            )
+            logger.info("Compiled bitrate model for inference")
+        except Exception as e:
+            logger.warning(f"Failed to compile bitrate model: {e}")
+
+        try:
+            self.quality_model.compile_for_inference()
+            logger.info("Compiled quality model for inference")
+        except Exception as e:
+            logger.warning(f"Failed to compile quality model: {e}")
+
     def _save_models(self):
         """Save trained models"""
         self.models_dir.mkdir(exist_ok=True)
@@ -87,29 +170,45 @@ class StreamingOptimizer:
 
         logger.info("Models saved")
 
-    async def optimize_bitrate(self) -> int:
+    def optimize_bitrates(
+            self,
+            windows: List[np.ndarray],
+            fallbacks: List[int]
+    ) -> List[int]:
         """
-        Predict optimal bitrate using LSTM model
+        Predict optimal bitrates using LSTM model
+
+        Windows of equal length are stacked and predicted in a single
+        batched forward pass.
+
+        Args:
+            windows: Feature windows (sequence_length, 10), one per tick
+            fallbacks: Current bitrate of each tick, kept while there isn't
+                enough data to predict
 
         Returns:
-            Recommended bitrate in kbps
+            Recommended bitrate in kbps for each tick
         """
-        # Get feature vector from network metrics
-        features = self.network_metrics.get_features()
-
-        if len(features) < 5:
-            # Not enough data yet, use current bitrate
-            return self.current_metrics.get('bitrate_kbps', 10000)
-
-        # Predict optimal bitrate
-        optimal_bitrate = self.bitrate_model.predict_bitrate(
-            features,
-            min_bitrate=2000,
-            max_bitrate=20000
-        )
+        bitrates = list(fallbacks)
+
+        # Group windows with enough data by length so each group stacks
+        groups: Dict[int, List[int]] = {}
+        for i, features in enumerate(windows):
+            if len(features) >= 5:
+                groups.setdefault(len(features), []).append(i)
+
+        # Predict optimal bitrates
+        for indices in groups.values():
+            predicted = self.bitrate_model.predict_bitrates(
+                np.stack([windows[i] for i in indices]),
+                min_bitrate=2000,
+                max_bitrate=20000
+            )
+            for i, bitrate in zip(indices, predicted):
+                bitrates[i] = bitrate
 
-        logger.debug(f"Predicted bitrate: {optimal_bitrate} kbps")
-        return optimal_bitrate
+        logger.debug(f"Predicted bitrates: {bitrates} kbps")
+        return bitrates
 
     def optimize_quality(self) -> Dict:
         """
@@ -128,7 +227,7 @@ class StreamingOptimizer:
         recommendations = self._action_to_recommendation(action)
 
         # If training enabled, store experience
-        if self.enable_training and self.previous_metrics:
+        if self.enable_training and self.previous_metrics is not None:
             prev_state = self.quality_model.get_state(self.previous_metrics)
             reward = self.quality_model.calculate_reward(
                 self.current_metrics,
@@ -145,7 +244,8 @@ class StreamingOptimizer:
 
             # Train on batch periodically
             if self.recommendations_sent % 10 == 0:
-                loss = self.quality_model.replay(batch_size=32)
+                with torch.inference_mode(False):
+                    loss = self.quality_model.replay(batch_size=32)
                 if loss is not None:
                     logger.debug(f"Training loss: {loss:.4f}")
 
@@ -153,44 +253,104 @@ class StreamingOptimizer:
 
     def _action_to_recommendation(self, action: int) -> Dict:
         """Convert action index to recommendation"""
-        current_res = self.current_metrics.get('resolution', '1920x1080')
-        current_fps = self.current_metrics.get('fps', 60)
-        current_bitrate = self.current_metrics.get('bitrate_kbps', 10000)
+        if not 0 <= action < len(_ACTIONS):
+            action = _NO_CHANGE
 
+        name, reason, target = _ACTIONS[action]
         recommendation = {
-            'action': 'no_change',
-            'reason': ''
+            'action': name,
+            'reason': reason
         }
 
-        if action == 0:  # Increase resolution
-            recommendation['action'] = 'increase_resolution'
-            recommendation['reason'] = 'Network stable, can increase quality'
-        elif action == 1:  # Decrease resolution
-            recommendation['action'] = 'decrease_resolution'
-            recommendation['reason'] = 'Network congested, reduce resolution'
-        elif action == 2:  # Increase FPS
-            recommendation['action'] = 'increase_fps'
-            recommendation['target_fps'] = min(current_fps + 10, 120)
-        elif action == 3:  # Decrease FPS
-            recommendation['action'] = 'decrease_fps'
-            recommendation['target_fps'] = max(current_fps - 10, 30)
-        elif action == 4:  # Increase bitrate
-            recommendation['action'] = 'increase_bitrate'
-            recommendation['target_bitrate'] = min(current_bitrate + 1000, 20000)
-        elif action == 5:  # Decrease bitrate
-            recommendation['action'] = 'decrease_bitrate'
-            recommendation['target_bitrate'] = max(current_bitrate - 1000, 2000)
-        elif action == 6:  # Faster preset
-            recommendation['action'] = 'use_faster_preset'
-            recommendation['reason'] = 'CPU overloaded'
-        elif action == 7:  # Slower preset
-            recommendation['action'] = 'use_slower_preset'
-            recommendation['reason'] = 'CPU underutilized, can improve quality'
-        else:  # No change
-            recommendation['action'] = 'no_change'
+        if target is not None:
+            field, key, step, limit = target
+            bound = min if step > 0 else max
+            # Metrics fields decode as floats, the server expects integers
+            recommendation[key] = int(bound(getattr(self.current_metrics, field) + step, limit))
 
         return recommendation
 
+    async def _receive_metrics(self):
+        """Forward metrics from the server into the metrics queue"""
+        while self.running:
+            try:
+                metrics = await self.collector.collect()
+            except websockets.ConnectionClosed as e:
+                logger.error(f"Metrics stream closed: {e}")
+                return
+
+            if metrics is None:
+                # Back off so repeated failures can't flood the log
+                await asyncio.sleep(0.1)
+                continue
+
+            await self.metrics_queue.put(metrics)
+
+    async def _next_batch(self) -> List[Metrics]:
+        """Wait for metrics, then drain whatever else has queued up"""
+        batch = [await asyncio.wait_for(self.metrics_queue.get(), timeout=5.0)]
+
+        while not self.metrics_queue.empty() and len(batch) < self.max_batch_size:
+            batch.append(self.metrics_queue.get_nowait())
+
+        return batch
+
+    def _process_batch(self, batch: List[Metrics]) -> List[Dict]:
+        """
+        Turn a batch of metrics messages into recommendations
+
+        Quality decisions are made tick by tick since each depends on the
+        previous metrics; bitrate predictions run once for the whole batch.
+
+        Returns:
+            One recommendation per metrics message, in order
+        """
+        windows = []
+        quality_recs = []
+
+        for metrics in batch:
+            self.previous_metrics = self.current_metrics
+            self.current_metrics = metrics
+
+            # Update network metrics
+            self.network_metrics.add_sample(
+                latency_ms=metrics.latency_ms,
+                jitter_ms=metrics.jitter_ms,
+                packet_loss=metrics.packet_loss,
+                bandwidth_kbps=metrics.bandwidth_kbps,
+                frame_complexity=metrics.complexity,
+                bitrate_kbps=metrics.bitrate_kbps
+            )
+            windows.append(self.network_metrics.get_features())
+
+            # Get recommendations
+            quality_recs.append(self.optimize_quality())
+            self.recommendations_sent += 1
+
+        bitrates = self.optimize_bitrates(
+            windows,
+            [int(metrics.bitrate_kbps) for metrics in batch]
+        )
+
+        # Combine recommendations
+        return [
+            {
+                'bitrate_kbps': optimal_bitrate,
+                'quality_action': quality_rec,
+                'confidence': float(1.0 - self.quality_model.epsilon),
+                'timestamp': metrics.timestamp
+            }
+            for metrics, optimal_bitrate, quality_rec
+            in zip(batch, bitrates, quality_recs)
+        ]
+
+    async def _send_recommendations(self, recommendations: List[Dict]):
+        """Send a batch's recommendations, at most send_batch_size per frame"""
+        for start in range(0, len(recommendations), self.send_batch_size):
+            await self.collector.send(
+                recommendations[start:start + self.send_batch_size]
+            )
+
     async def run(self):
         """Main optimization loop"""
         logger.info(f"🤖 Starting ML Optimizer")
@@ -199,66 +359,54 @@ class StreamingOptimizer:
         logger.info("")
 
         self.running = True
+        receiver = None
+        self.metrics_queue = asyncio.Queue(maxsize=_METRICS_QUEUE_SIZE)
 
         try:
             # Connect to metrics stream
             await self.collector.connect()
-
-            while self.running:
-                try:
-                    # Receive metrics from server
-                    metrics = await asyncio.wait_for(
-                        self.collector.collect(),
-                        timeout=5.0
-                    )
-
-                    if not metrics:
-                        continue
-
-                    self.previous_metrics = self.current_metrics.copy()
-                    self.current_metrics = metrics
-
-                    # Update network metrics
-                    self.network_metrics.add_sample(
-                        latency_ms=metrics.get('latency_ms', 30),
-                        jitter_ms=metrics.get('jitter_ms', 5),
-                        packet_loss=metrics.get('packet_loss', 0.0),
-                        bandwidth_kbps=metrics.get('bandwidth_kbps', 15000),
-                        frame_complexity=metrics.get('complexity', 0.5),
-                        bitrate_kbps=metrics.get('bitrate_kbps', 10000)
-                    )
-
-                    # Get recommendations
-                    optimal_bitrate = await self.optimize_bitrate()
-                    quality_rec = self.optimize_quality()
-
-                    # Combine recommendations
-                    recommendations = {
-                        'bitrate_kbps': optimal_bitrate,
-                        'quality_action': quality_rec,
-                        'confidence': float(1.0 - self.quality_model.epsilon),
-                        'timestamp': metrics.get('timestamp', 0)
-                    }
-
-                    # Send back to server
-                    # TODO: Implement WebSocket send to server
-
-                    self.recommendations_sent += 1
-
-                    if self.recommendations_sent % 10 == 0:
-                        logger.info(
-                            f"📊 Recommendations: bitrate={optimal_bitrate} kbps, "
-                            f"action={quality_rec['action']}, "
-                            f"sent={self.recommendations_sent}"
-                        )
-
-                except asyncio.TimeoutError:
-                    logger.warning("Timeout waiting for metrics")
-                except Exception as e:
-                    logger.error(f"Error in optimization loop: {e}")
-                    await asyncio.sleep(1)
+            receiver = asyncio.create_task(self._receive_metrics())
+
+            # One inference context for the whole loop, training steps opt
+            # back out of it
+            with torch.inference_mode():
+                while self.running:
+                    try:
+                        # Receive metrics from server
+                        batch = await self._next_batch()
+
+                        # Get recommendations
+                        recommendations = self._process_batch(batch)
+
+                        # Send back to server right away, the batch is
+                        # already one frame per drained queue
+                        await self._send_recommendations(recommendations)
+
+                        previous_sent = self.recommendations_sent - len(batch)
+                        if self.recommendations_sent // 10 > previous_sent // 10:
+                            latest = recommendations[-1]
+                            logger.info(
+                                f"📊 Recommendations: bitrate={latest['bitrate_kbps']} kbps, "
+                                f"action={latest['quality_action']['action']}, "
+                                f"sent={self.recommendations_sent}"
+                            )
+
+                    except asyncio.TimeoutError:
+                        # Nothing more will arrive once the receiver exits
+                        if receiver.done():
+                            if not receiver.cancelled() and receiver.exception():
+                                logger.error(f"Metrics receiver failed: {receiver.exception()}")
+                            logger.error("Metrics stream ended, stopping")
+                            break
+                        logger.warning("Timeout waiting for metrics")
+                    except Exception as e:
+                        logger.error(f"Error in optimization loop: {e}")
+                        await asyncio.sleep(1)
 
         finally:
+            if receiver is not None:
+                receiver.cancel()
+
             await self.collector.close()
 
             if self.enable_training:
@@ -1,12 +1,86 @@
+import random
 import torch
 import torch.nn as nn
 import numpy as np
-from collections import deque
-from typing import Dict, List, Tuple
+from typing import List, Tuple
 import logging
 
+from .checkpoint import load_checkpoint
+from .jit import warmup
+from .metrics import Metrics
+
+# Numba is optional, fall back to plain Python functions without it
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 logger = logging.getLogger(__name__)
 
+# State vector layout, Metrics field names
+_STATE_FIELDS = (
+    'fps',
+    'frame_time_ms',
+    'encode_time_ms',
+    'latency_ms',
+    'bitrate_kbps',
+    'packet_loss',
+    'buffer_occupancy',
+    'cpu_usage',
+    'gpu_usage',
+    'memory_usage',
+    'quality_score',
+    'frame_drops',
+    'jitter_ms',
+    'bandwidth_kbps',
+    'complexity_score',
+)
+
+# Reciprocal normalization scales matching _STATE_FIELDS
+_STATE_SCALE = np.array([
+    1 / 120.0, 1 / 50.0, 1 / 20.0, 1 / 200.0, 1 / 30000.0,
+    1.0, 1.0, 1.0, 1.0, 1.0, 1.0,
+    1 / 10.0, 1 / 30.0, 1 / 30000.0, 1.0,
+], dtype=np.float32)
+
+
+@njit(cache=True)
+def _compute_reward(
+        quality: float,
+        fps: float,
+        latency: float,
+        frame_drops: float,
+        cpu: float,
+        packet_loss: float
+) -> float:
+    """Reward arithmetic for QualityOptimizer.calculate_reward"""
+    reward = 0.0
+
+    # Quality (most important)
+    reward += quality * 10.0
+
+    # FPS stability
+    target_fps = 60.0
+    fps_penalty = abs(fps - target_fps) / target_fps
+    reward -= fps_penalty * 5.0
+
+    # Latency penalty
+    if latency > 50.0:
+        reward -= (latency - 50.0) * 0.1
+
+    # Frame drops penalty
+    reward -= frame_drops * 2.0
+
+    # CPU efficiency bonus
+    if cpu < 0.6:
+        reward += (0.6 - cpu) * 2.0
+
+    # Packet loss penalty
+    reward -= packet_loss * 20.0
+
+    return reward
+
 
 class QualityOptimizer:
     """
@@ -34,7 +108,9 @@ class QualityOptimizer:
             epsilon_min: float = 0.01,
             epsilon_decay: float = 0.995,
             learning_rate: float = 0.001,
-            memory_size: int = 2000
+            memory_size: int = 2000,
+            target_update_freq: int = 100,
+            tau: float = 1.0
     ):
         self.gamma = gamma
         self.epsilon = epsilon
@@ -42,14 +118,42 @@ class QualityOptimizer:
         self.epsilon_decay = epsilon_decay
         self.learning_rate = learning_rate
 
-        # Experience replay memory
-        self.memory = deque(maxlen=memory_size)
+        # Target network sync: every target_update_freq replay steps, blend
+        # in tau of the online weights (1.0 is a hard copy)
+        self.target_update_freq = target_update_freq
+        self.tau = tau
+        self.train_steps = 0
+
+        # Experience replay memory, one preallocated array per field
+        self.memory_size = memory_size
+        self.S = np.zeros((memory_size, self.STATE_SIZE), dtype=np.float32)
+        self.A = np.zeros(memory_size, dtype=np.int64)
+        self.R = np.zeros(memory_size, dtype=np.float32)
+        self.S2 = np.zeros_like(self.S)
+        self.D = np.zeros(memory_size, dtype=np.float32)
+
+        # Next write position and number of stored experiences
+        self._i = 0
+        self._n = 0
+        self._rng = np.random.default_rng()
 
         # Q-networks
         self.model = self._build_model()
         self.target_model = self._build_model()
+
+        # Matching (target, online) tensor pairs for in-place syncing
+        self._sync_pairs = list(zip(
+            list(self.target_model.parameters()) + list(self.target_model.buffers()),
+            list(self.model.parameters()) + list(self.model.buffers())
+        ))
         self.update_target_model()
 
+        # Frozen TorchScript copy used by act() when compiled
+        self._policy = None
+
+        # Reused input tensor for act()
+        self._state_buf = torch.empty(1, self.STATE_SIZE, dtype=torch.float32)
+
         # Optimizer
         self.optimizer = torch.optim.Adam(
             self.model.parameters(),
@@ -72,37 +176,53 @@ class QualityOptimizer:
         )
         return model
 
-    def update_target_model(self):
-        """Copy weights from model to target model"""
-        self.target_model.load_state_dict(self.model.state_dict())
+    def compile_for_inference(self):
+        """
+        Trace, freeze and optimize a copy of the Q-network for act()
+
+        The compiled copy holds constant weights and does not follow
+        further training.
+        """
+        self.model.eval()
+        example = torch.zeros(1, self.STATE_SIZE)
+        traced = torch.jit.trace(self.model, example)
+        policy = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+
+        warmup(policy, example)
+
+        self._policy = policy
+
+    def update_target_model(self, tau: float = 1.0):
+        """
+        Copy weights from model to target model
+
+        Args:
+            tau: Fraction of the online weights to blend in (Polyak
+                averaging), 1.0 copies them outright
+        """
+        with torch.no_grad():
+            for target, source in self._sync_pairs:
+                if tau >= 1.0:
+                    target.copy_(source)
+                else:
+                    target.mul_(1.0 - tau).add_(source, alpha=tau)
 
-    def get_state(self, metrics: Dict) -> np.ndarray:
+    def get_state(self, metrics: Metrics) -> np.ndarray:
         """
         Convert metrics to state vector
 
         Args:
-            metrics: Dictionary of current metrics
+            metrics: Current metrics
 
         Returns:
             state: numpy array of shape (STATE_SIZE,)
         """
-        state = np.array([
-            metrics.get('fps', 60) / 120.0,
-            metrics.get('frame_time_ms', 16) / 50.0,
-            metrics.get('encode_time_ms', 5) / 20.0,
-            metrics.get('latency_ms', 30) / 200.0,
-            metrics.get('bitrate_kbps', 10000) / 30000.0,
-            metrics.get('packet_loss', 0.0),
-            metrics.get('buffer_occupancy', 0.5),
-            metrics.get('cpu_usage', 0.5),
-            metrics.get('gpu_usage', 0.5),
-            metrics.get('memory_usage', 0.5),
-            metrics.get('quality_score', 0.9),
-            metrics.get('frame_drops', 0) / 10.0,
-            metrics.get('jitter_ms', 5) / 30.0,
-            metrics.get('bandwidth_kbps', 15000) / 30000.0,
-            metrics.get('complexity_score', 0.5)
-        ], dtype=np.float32)
+        state = np.fromiter(
+            (getattr(metrics, field) for field in _STATE_FIELDS),
+            dtype=np.float32,
+            count=self.STATE_SIZE
+        )
+        np.multiply(state, _STATE_SCALE, out=state)
 
         return state
 
@@ -110,6 +230,9 @@ class QualityOptimizer:
         """
         Choose action using epsilon-greedy policy
 
+        Doesn't disable autograd itself, call under torch.inference_mode()
+        to skip graph recording.
+
         Args:
             state: Current state vector
 
@@ -117,15 +240,15 @@ class QualityOptimizer:
             action: Action index (0-8)
         """
         # Exploration
-        if np.random.rand() <= self.epsilon:
-            return np.random.randint(self.ACTION_SIZE)
+        if random.random() <= self.epsilon:
+            return random.randrange(self.ACTION_SIZE)
 
         # Exploitation
         self.model.eval()
-        with torch.no_grad():
-            state_tensor = torch.FloatTensor(state).unsqueeze(0)
-            q_values = self.model(state_tensor)
-            return torch.argmax(q_values).item()
+        model = self._policy if self._policy is not None else self.model
+        self._state_buf[0].copy_(torch.from_numpy(state))
+        q_values = model(self._state_buf)
+        return torch.argmax(q_values).item()
 
     def remember(
             self,
@@ -136,7 +259,17 @@ class QualityOptimizer:
             done: bool
     ):
         """Store experience in replay memory"""
-        self.memory.append((state, action, reward, next_state, done))
+        i = self._i
+        self.S[i] = state
+        self.A[i] = action
+        self.R[i] = reward
+        self.S2[i] = next_state
+        self.D[i] = done
+
+        # Overwrite the oldest experience once memory is full
+        self._i = (i + 1) % self.memory_size
+        if self._n < self.memory_size:
+            self._n += 1
 
     def replay(self, batch_size: int = 32):
         """
@@ -145,22 +278,21 @@ class QualityOptimizer:
         Args:
             batch_size: Number of samples to train on
         """
-        if len(self.memory) < batch_size:
+        if self._n < batch_size:
             return
 
-        # Sample random batch
-        indices = np.random.choice(len(self.memory), batch_size, replace=False)
-        batch = [self.memory[i] for i in indices]
+        # Sample random batch with replacement, duplicates are harmless for
+        # replay; fancy indexing yields fresh contiguous arrays
+        indices = self._rng.integers(0, self._n, batch_size)
+        states = torch.from_numpy(self.S[indices])
+        actions = torch.from_numpy(self.A[indices])
+        rewards = torch.from_numpy(self.R[indices])
+        next_states = torch.from_numpy(self.S2[indices])
+        dones = torch.from_numpy(self.D[indices])
 
-        # Unpack batch
-        states = torch.FloatTensor([s for s, _, _, _, _ in batch])
-        actions = torch.LongTensor([a for _, a, _, _, _ in batch])
-        rewards = torch.FloatTensor([r for _, _, r, _, _ in batch])
-        next_states = torch.FloatTensor([ns for _, _, _, ns, _ in batch])
-        dones = torch.FloatTensor([d for _, _, _, _, d in batch])
+        self.model.train()
 
         # Current Q values
-        self.model.train()
         current_q = self.model(states).gather(1, actions.unsqueeze(1))
 
         # Target Q values
@@ -175,6 +307,11 @@ class QualityOptimizer:
         loss.backward()
         self.optimizer.step()
 
+        # Sync target network periodically
+        self.train_steps += 1
+        if self.train_steps % self.target_update_freq == 0:
+            self.update_target_model(self.tau)
+
         # Decay epsilon
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
@@ -183,8 +320,8 @@ class QualityOptimizer:
 
     def calculate_reward(
             self,
-            metrics: Dict,
-            prev_metrics: Dict
+            metrics: Metrics,
+            prev_metrics: Metrics
     ) -> float:
         """
         Calculate reward based on metrics
@@ -196,37 +333,14 @@ class QualityOptimizer:
         - High frame drops
         - High CPU usage
         """
-        reward = 0.0
-
-        # Quality (most important)
-        quality = metrics.get('quality_score', 0.9)
-        reward += quality * 10.0
-
-        # FPS stability
-        fps = metrics.get('fps', 60)
-        target_fps = 60
-        fps_penalty = abs(fps - target_fps) / target_fps
-        reward -= fps_penalty * 5.0
-
-        # Latency penalty
-        latency = metrics.get('latency_ms', 30)
-        if latency > 50:
-            reward -= (latency - 50) * 0.1
-
-        # Frame drops penalty
-        frame_drops = metrics.get('frame_drops', 0)
-        reward -= frame_drops * 2.0
-
-        # CPU efficiency bonus
-        cpu = metrics.get('cpu_usage', 0.5)
-        if cpu < 0.6:
-            reward += (0.6 - cpu) * 2.0
-
-        # Packet loss penalty
-        packet_loss = metrics.get('packet_loss', 0.0)
-        reward -= packet_loss * 20.0
-
-        return reward
+        return _compute_reward(
+            float(metrics.quality_score),
+            float(metrics.fps),
+            float(metrics.latency_ms),
+            float(metrics.frame_drops),
+            float(metrics.cpu_usage),
+            float(metrics.packet_loss)
+        )
 
     def save(self, path: str):
         """Save model weights"""
@@ -240,7 +354,7 @@ class QualityOptimizer:
 
     def load(self, path: str):
         """Load model weights"""
-        checkpoint = torch.load(path)
+        checkpoint = load_checkpoint(path)
         self.model.load_state_dict(checkpoint['model_state_dict'])
         self.target_model.load_state_dict(checkpoint['target_model_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
@@ -1,23 +1,116 @@
+import copy
+import time
 import torch
+import torch.distributed as dist
+import torch.nn as nn
 import numpy as np
+from contextlib import nullcontext
+from functools import partial
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, DistributedSampler, TensorDataset
 from pathlib import Path
 from typing import Optional
 import logging
 from tqdm import tqdm
 
 from .bitrate_predictor import BitratePredictor, NetworkMetrics
+from .dataset import load_dataset
+from .jit import warmup
+from .data_loading import CUDAPrefetcher, PinnedStaging, to_device
 from .quality_optimizer import QualityOptimizer
 
 logger = logging.getLogger(__name__)
 
 
+class _GraphedSteps:
+    """
+    Run several fixed-shape training steps as one CUDA graph replay
+
+    The first calls run eagerly on a side stream so cuDNN autotuning and
+    the caching allocator settle before capture. Graph memory grows with
+    the number of captured steps.
+    """
+
+    WARMUP_CALLS = 3
+
+    def __init__(self, step_fn, steps: int):
+        """
+        Args:
+            step_fn: (X, y) -> detached loss, runs forward, backward,
+                optimizer step and zero_grad(set_to_none=True)
+            steps: Training steps per replay
+        """
+        self.step_fn = step_fn
+        self.steps = steps
+        self.warmup = self.WARMUP_CALLS
+        self.stream = torch.cuda.Stream()
+        self.graph = None
+        self.static_x = None
+        self.static_y = None
+        self.static_loss = None
+
+    def __call__(self, batches) -> float:
+        """Train on exactly `steps` batches and return their summed loss"""
+        if self.warmup:
+            self.warmup -= 1
+            self.stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(self.stream):
+                loss = sum(self.step_fn(X, y).item() for X, y in batches)
+            torch.cuda.current_stream().wait_stream(self.stream)
+            return loss
+
+        if self.graph is None:
+            self._capture(batches)
+
+        for k, (X, y) in enumerate(batches):
+            self.static_x[k].copy_(X, non_blocking=True)
+            self.static_y[k].copy_(y, non_blocking=True)
+        self.graph.replay()
+
+        return self.static_loss.sum().item()
+
+    def _capture(self, batches):
+        # Capture only records kernels, the first replay trains on batches
+        self.static_x = torch.stack([X for X, _ in batches])
+        self.static_y = torch.stack([y for _, y in batches])
+
+        self.graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(self.graph):
+            self.static_loss = torch.stack([
+                self.step_fn(self.static_x[k], self.static_y[k])
+                for k in range(self.steps)
+            ])
+
+
 class Trainer:
     """Train ML models"""
 
-    def __init__(self, models_dir: str = "models"):
+    def __init__(
+            self,
+            models_dir: str = "models",
+            rank: int = 0,
+            world_size: int = 1,
+            local_rank: int = 0,
+            use_cuda: bool = True,
+            seed: Optional[int] = None
+    ):
         self.models_dir = Path(models_dir)
         self.models_dir.mkdir(exist_ok=True)
 
+        # Distributed layout, rank 0 owns logging and checkpoints
+        self.rank = rank
+        self.world_size = world_size
+        self.distributed = world_size > 1
+        self.is_main = rank == 0
+
+        # Drives shuffling and synthetic data, unseeded runs draw fresh
+        self.seed = seed
+
+        if use_cuda and torch.cuda.is_available():
+            self.device = torch.device('cuda', local_rank)
+        else:
+            self.device = torch.device('cpu')
+
         self.bitrate_model = BitratePredictor()
         self.quality_model = QualityOptimizer()
 
@@ -26,7 +119,22 @@ class Trainer:
             dataset_path: str,
             epochs: int = 100,
             batch_size: int = 32,
-            learning_rate: float = 0.001
+            learning_rate: float = 0.001,
+            optimizer_name: str = "adam",
+            compile_model: bool = False,
+            compile_mode: str = "reduce-overhead",
+            precision: str = "bf16",
+            num_workers: int = 2,
+            pin_memory: Optional[bool] = None,
+            prefetch_factor: int = 4,
+            pinned_staging: bool = False,
+            prefetch_depth: int = 2,
+            channels_last: Optional[bool] = None,
+            accum_steps: int = 1,
+            jit_steps: int = 0,
+            profile_steps: int = 0,
+            profile_dir: str = "profiles",
+            rebuild_cache: bool = False
     ):
         """
         Train bitrate prediction model
@@ -36,91 +144,517 @@ class Trainer:
             epochs: Number of training epochs
             batch_size: Batch size
             learning_rate: Learning rate
+            optimizer_name: adam, adamw or sgd, fused kernels on GPU
+            compile_model: Compile the training model with torch.compile
+            compile_mode: torch.compile mode
+            precision: fp32, tf32, bf16 or fp16, reduced precisions only
+                apply on GPU
+            num_workers: DataLoader worker processes, 0 loads in-process
+            pin_memory: Pin batches in page-locked memory, defaults to
+                whether training runs on GPU
+            prefetch_factor: Batches each worker loads ahead
+            pinned_staging: Stage batches through persistent pinned buffers
+                instead of pinning each batch in the DataLoader (GPU only)
+            prefetch_depth: Batches assembled ahead on a background thread
+                and copied on a side stream (GPU only), 0 disables
+            channels_last: Use NHWC memory format, defaults to whether the
+                model has Conv2d layers; skipped for models without them
+            accum_steps: Micro-batches whose gradients are accumulated per
+                optimizer step
+            jit_steps: Training steps captured into one CUDA graph and
+                replayed per launch (GPU only), 0 disables
+            profile_steps: Batches recorded with torch.profiler after one
+                skipped and two warmup batches, 0 disables
+            profile_dir: Directory receiving the profiler traces
+            rebuild_cache: Convert the dataset again even if cached
         """
-        logger.info("Training bitrate predictor...")
+        if self.is_main:
+            logger.info("Training bitrate predictor...")
+
+        X_train, y_train = self._load_training_data(
+            dataset_path,
+            rebuild_cache,
+            batch_size
+        )
+
+        use_cuda = self.device.type == 'cuda'
+        dataset = TensorDataset(torch.from_numpy(X_train), torch.from_numpy(y_train))
+        sampler = DistributedSampler(
+            dataset,
+            num_replicas=self.world_size,
+            rank=self.rank,
+            shuffle=True,
+            seed=self.seed or 0,
+            drop_last=True
+        ) if self.distributed else None
+        generator = torch.Generator()
+        if self.seed is not None:
+            generator.manual_seed(self.seed)
+        # Workers pin batches themselves, the training step only issues
+        # non-blocking copies
+        if pin_memory is None:
+            pin_memory = use_cuda
+        pinned_staging = pinned_staging and use_cuda
+        worker_options = dict(
+            num_workers=num_workers,
+            prefetch_factor=prefetch_factor,
+            persistent_workers=True
+        ) if num_workers > 0 else {}
+        loader = DataLoader(
+            dataset,
+            batch_size=batch_size,
+            shuffle=sampler is None,
+            sampler=sampler,
+            drop_last=True,
+            generator=generator,
+            pin_memory=pin_memory and use_cuda and not pinned_staging,
+            **worker_options
+        )
+
+        self.bitrate_model.to(self.device)
+
+        # NHWC only changes anything for conv layers and 4D inputs
+        has_conv = any(
+            isinstance(m, torch.nn.Conv2d) for m in self.bitrate_model.modules()
+        )
+        if channels_last is None:
+            channels_last = has_conv
+        elif channels_last and not has_conv:
+            logger.info("Model has no Conv2d layers, skipping channels_last")
+        channels_last = channels_last and has_conv
 
-        # TODO: Load dataset
-        # For now, use synthetic data
-        X_train, y_train = self._generate_synthetic_data(1000)
+        if channels_last:
+            self.bitrate_model.to(memory_format=torch.channels_last)
 
-        optimizer = torch.optim.Adam(
-            self.bitrate_model.parameters(),
-            lr=learning_rate
+        model = self.bitrate_model
+        ddp_model = None
+
+        if self.distributed:
+            model = ddp_model = DistributedDataParallel(
+                model,
+                device_ids=[self.device.index] if use_cuda else None
+            )
+
+            # Effective batch grows with the number of ranks, scale the
+            # learning rate linearly to match
+            learning_rate *= self.world_size
+
+        # Mixed precision on GPU. bf16 needs no loss scaling, fp16 uses a
+        # GradScaler to keep gradients in range. Master weights stay fp32.
+        if use_cuda and precision == 'bf16' and not torch.cuda.is_bf16_supported():
+            logger.warning("bf16 not supported on this GPU, using fp16")
+            precision = 'fp16'
+
+        jit_steps = self._graph_steps(jit_steps, use_cuda, precision, accum_steps)
+
+        # Built before compiling so the fused step is what gets traced, the
+        # compiled wrapper shares these parameters
+        optimizer = self._build_optimizer(
+            model.parameters(),
+            optimizer_name,
+            learning_rate,
+            use_cuda,
+            # Keeps the step count on device so the update can be captured
+            capturable=bool(jit_steps)
         )
         loss_fn = torch.nn.MSELoss()
 
-        self.bitrate_model.train()
+        if precision in ('fp32', 'tf32'):
+            # fp32 means full precision matmuls, tf32 opts in to TF32
+            allow_tf32 = precision == 'tf32'
+            torch.backends.cuda.matmul.allow_tf32 = allow_tf32
+            torch.backends.cudnn.allow_tf32 = allow_tf32
 
-        for epoch in tqdm(range(epochs), desc="Training"):
-            epoch_loss = 0.0
-            num_batches = len(X_train) // batch_size
+        use_amp = use_cuda and precision in ('bf16', 'fp16')
+        amp_dtype = torch.float16 if precision == 'fp16' else torch.bfloat16
+        scaler = torch.amp.GradScaler('cuda', enabled=use_amp and precision == 'fp16')
 
-            for i in range(num_batches):
-                start_idx = i * batch_size
-                end_idx = start_idx + batch_size
+        model.train()
 
-                # Get batch
-                X_batch = torch.FloatTensor(X_train[start_idx:end_idx])
-                y_batch = torch.FloatTensor(y_train[start_idx:end_idx])
+        if compile_model:
+            # Our graph already removes launch overhead, and the cudagraph
+            # compile modes can't be captured inside another graph
+            if jit_steps and compile_mode in ('reduce-overhead', 'max-autotune'):
+                compile_mode = 'max-autotune-no-cudagraphs' \
+                    if compile_mode == 'max-autotune' else 'default'
 
-                # Forward pass
-                predictions = self.bitrate_model(X_batch)
-                loss = loss_fn(predictions.squeeze(), y_batch)
+            X_probe = torch.from_numpy(X_train[:batch_size]).to(self.device)
+            y_probe = torch.from_numpy(y_train[:batch_size]).to(self.device)
 
-                # Backward pass
-                optimizer.zero_grad()
+            def probe(compiled):
+                """Forward and backward one batch without stepping"""
+                try:
+                    with torch.autocast(
+                            device_type='cuda',
+                            dtype=amp_dtype,
+                            enabled=use_amp
+                    ):
+                        loss = loss_fn(compiled(X_probe).squeeze(), y_probe)
+                    loss.backward()
+                finally:
+                    optimizer.zero_grad(set_to_none=True)
+
+            model = self._compile(model, compile_mode, probe)
+
+        # Host-to-device copies, staging buffers take their shapes from the
+        # first batch which drop_last keeps fixed
+        if pinned_staging:
+            transfer = PinnedStaging(self.device).to_device
+        else:
+            transfer = partial(to_device, device=self.device)
+
+        if use_cuda and prefetch_depth > 0:
+            prefetcher = CUDAPrefetcher(loader, self.device, prefetch_depth, transfer)
+        else:
+            prefetcher = None
+
+        # NVTX ranges for nsys timelines, only while profiling
+        profiler = self._profiler(profile_steps, profile_dir, use_cuda)
+        if profiler is not None and use_cuda:
+            mark = torch.cuda.nvtx.range
+        else:
+            mark = lambda name: nullcontext()
+
+        def train_step(X_batch, y_batch):
+            """One optimizer step without loss scaling or accumulation"""
+            with mark("forward"), torch.autocast(
+                    device_type='cuda',
+                    dtype=amp_dtype,
+                    enabled=use_amp
+            ):
+                predictions = model(X_batch)
+                loss = loss_fn(predictions.squeeze(), y_batch)
+            with mark("backward"):
                 loss.backward()
+            with mark("optimizer"):
                 optimizer.step()
+                optimizer.zero_grad(set_to_none=True)
+            return loss.detach()
+
+        graphed = _GraphedSteps(train_step, jit_steps) if jit_steps else None
+
+        if profiler is not None:
+            profiler.start()
+
+        for epoch in tqdm(range(epochs), desc="Training", disable=not self.is_main):
+            if sampler is not None:
+                sampler.set_epoch(epoch)
+
+            epoch_loss = 0.0
+            num_batches = len(loader)
+
+            # Get batches, copies overlap with compute from pinned memory
+            if prefetcher is not None:
+                batches = prefetcher
+            else:
+                batches = map(transfer, loader)
+
+            optimizer.zero_grad(set_to_none=True)
+            pending = []
+
+            for i, (X_batch, y_batch) in enumerate(batches):
+                if channels_last and X_batch.dim() == 4:
+                    X_batch = X_batch.contiguous(memory_format=torch.channels_last)
+
+                # Collect jit_steps batches per graph replay
+                if graphed is not None:
+                    pending.append((X_batch, y_batch))
+                    if len(pending) == jit_steps:
+                        epoch_loss += graphed(pending)
+                        pending = []
+                    if profiler is not None:
+                        profiler.step()
+                    continue
+
+                # Step on every accum_steps-th micro-batch and at epoch end,
+                # DDP only needs to all-reduce gradients before a step
+                step = (i + 1) % accum_steps == 0 or i + 1 == num_batches
+                sync = nullcontext() if step or ddp_model is None else ddp_model.no_sync()
+
+                with sync:
+                    # Forward pass
+                    with mark("forward"), torch.autocast(
+                            device_type='cuda',
+                            dtype=amp_dtype,
+                            enabled=use_amp
+                    ):
+                        predictions = model(X_batch)
+                        loss = loss_fn(predictions.squeeze(), y_batch)
+
+                    # Backward pass
+                    with mark("backward"):
+                        scaler.scale(loss / accum_steps).backward()
+
+                if step:
+                    with mark("optimizer"):
+                        scaler.step(optimizer)
+                        scaler.update()
+                        optimizer.zero_grad(set_to_none=True)
 
                 epoch_loss += loss.item()
 
+                # Closes this batch's profiler step
+                if profiler is not None:
+                    profiler.step()
+
+            # Leftover batches that don't fill a graph run eagerly
+            for X_batch, y_batch in pending:
+                epoch_loss += train_step(X_batch, y_batch).item()
+
             avg_loss = epoch_loss / num_batches
 
-            if (epoch + 1) % 10 == 0:
-                logger.info(f"Epoch {epoch+1}/{epochs}, Loss: {avg_loss:.4f}")
+            if self.is_main:
+                if (epoch + 1) % 10 == 0:
+                    logger.info("Epoch %d/%d, Loss: %.4f", epoch + 1, epochs, avg_loss)
+                else:
+                    logger.debug("Epoch %d/%d, Loss: %.4f", epoch + 1, epochs, avg_loss)
+
+        if profiler is not None:
+            profiler.stop()
+            logger.info("Profiler traces written to %s", profile_dir)
+
+        # Save model, unwrapped so the checkpoint loads without DDP
+        if self.is_main:
+            model_path = self.models_dir / "bitrate_predictor.pt"
+            torch.save(self.bitrate_model.state_dict(), model_path)
+            logger.info("Model saved to %s", model_path)
+
+    def export_bitrate_predictor(
+            self,
+            sequence_length: int = 30,
+            iterations: int = 100
+    ):
+        """
+        Save TorchScript fp32 and dynamic INT8 copies of the bitrate model
+
+        Both land next to the state_dict checkpoint so inference can load
+        whichever suits its CPU. Logs each file's size and single-window
+        CPU latency.
+
+        Args:
+            sequence_length: Window length of the benchmark input
+            iterations: Timed predictions per variant
+        """
+        if not self.is_main:
+            return
+
+        # Quantized kernels run on CPU only
+        model = copy.deepcopy(self.bitrate_model).cpu().eval()
+        variants = {
+            'fp32': model,
+            'int8': torch.ao.quantization.quantize_dynamic(
+                model,
+                {nn.LSTM, nn.Linear},
+                dtype=torch.qint8
+            ),
+        }
+
+        example = torch.zeros(1, sequence_length, model.input_size)
+        for name, variant in variants.items():
+            path = self.models_dir / f"bitrate_predictor_{name}.pt"
+            scripted = torch.jit.script(variant)
+            torch.jit.save(scripted, str(path))
+
+            warmup(scripted, example)
+            with torch.inference_mode():
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    scripted(example)
+                latency_ms = (time.perf_counter() - start) * 1000 / iterations
+
+            logger.info(
+                "Exported %s model to %s (%.1f KiB, %.3f ms/prediction)",
+                name, path, path.stat().st_size / 1024, latency_ms
+            )
+
+    def _load_training_data(
+            self,
+            dataset_path: str,
+            rebuild_cache: bool,
+            batch_size: int
+    ):
+        """Load the cached dataset, or synthetic data if it doesn't exist"""
+        if not Path(dataset_path).exists():
+            if self.is_main:
+                logger.warning("Dataset %s not found, using synthetic data", dataset_path)
+
+            # Ranks must agree on the dataset for the sampler to shard it,
+            # so share a seed when distributed
+            seed = self.seed
+            if seed is None and self.distributed:
+                seed = 0
+            return self._generate_synthetic_data(1000, seed=seed)
+
+        # Rank 0 converts the dataset, the others map the finished cache
+        if self.is_main:
+            data = load_dataset(dataset_path, rebuild_cache=rebuild_cache)
+        if self.distributed:
+            dist.barrier()
+        if not self.is_main:
+            data = load_dataset(dataset_path)
+
+        # drop_last would otherwise leave every rank without a single batch
+        num_windows = len(data[0])
+        if num_windows // self.world_size < batch_size:
+            raise ValueError(
+                f"Dataset {dataset_path} has {num_windows} windows, need at "
+                f"least batch_size ({batch_size}) windows per rank "
+                f"({batch_size * self.world_size} total)"
+            )
+
+        return data
+
+    def _graph_steps(
+            self,
+            jit_steps: int,
+            use_cuda: bool,
+            precision: str,
+            accum_steps: int
+    ) -> int:
+        """Return jit_steps, or 0 where CUDA graph capture can't be used"""
+        if jit_steps <= 0:
+            return 0
 
-        # Save model
-        model_path = self.models_dir / "bitrate_predictor.pt"
-        torch.save(self.bitrate_model.state_dict(), model_path)
-        logger.info(f"Model saved to {model_path}")
+        reason = None
+        if not use_cuda:
+            reason = "training on CPU"
+        elif self.distributed:
+            reason = "DDP all-reduces outside the graph"
+        elif precision == 'fp16':
+            reason = "GradScaler steps can't be captured"
+        elif accum_steps > 1:
+            reason = "gradient accumulation is enabled"
+
+        if reason is not None:
+            if self.is_main:
+                logger.warning("Ignoring --jit-steps, %s", reason)
+            return 0
+
+        if self.is_main:
+            logger.info("Capturing %d training steps per CUDA graph", jit_steps)
+        return jit_steps
+
+    def _build_optimizer(
+            self,
+            params,
+            name: str,
+            learning_rate: float,
+            use_cuda: bool,
+            capturable: bool = False
+    ) -> torch.optim.Optimizer:
+        """
+        Create the optimizer with its multi-tensor implementation
+
+        On GPU the fused kernel updates every parameter in one launch,
+        builds without it (older torch, some ROCm versions) fall back to
+        the foreach implementation.
+        """
+        optimizers = {
+            'adam': torch.optim.Adam,
+            'adamw': torch.optim.AdamW,
+            'sgd': torch.optim.SGD,
+        }
+        if name not in optimizers:
+            raise ValueError(f"Unknown optimizer {name}, expected one of {list(optimizers)}")
+
+        params = list(params)
+        options = dict(lr=learning_rate)
+        if capturable and name != 'sgd':
+            options['capturable'] = True
+
+        if use_cuda:
+            try:
+                return optimizers[name](params, fused=True, **options)
+            except (TypeError, RuntimeError) as e:
+                if self.is_main:
+                    logger.warning("Fused %s unavailable, using foreach: %s", name, e)
+            return optimizers[name](params, foreach=True, **options)
+
+        return optimizers[name](params, **options)
+
+    def _profiler(
+            self,
+            profile_steps: int,
+            profile_dir: str,
+            use_cuda: bool
+    ) -> Optional[torch.profiler.profile]:
+        """Build a one-shot profiler for rank 0, or None when disabled"""
+        if profile_steps <= 0 or not self.is_main:
+            return None
+
+        activities = [torch.profiler.ProfilerActivity.CPU]
+        if use_cuda:
+            activities.append(torch.profiler.ProfilerActivity.CUDA)
+
+        return torch.profiler.profile(
+            activities=activities,
+            schedule=torch.profiler.schedule(
+                wait=1,
+                warmup=2,
+                active=profile_steps,
+                repeat=1
+            ),
+            on_trace_ready=torch.profiler.tensorboard_trace_handler(profile_dir),
+            record_shapes=True,
+            with_stack=True
+        )
+
+    def _compile(
+            self,
+            model: torch.nn.Module,
+            mode: str,
+            probe
+    ) -> torch.nn.Module:
+        """
+        Wrap model with torch.compile, falling back to eager on failure
+
+        Compilation is lazy, so probe runs the compiled model once to raise
+        Dynamo/Inductor errors here instead of inside the epoch loop.
+        """
+        try:
+            compiled = torch.compile(model, mode=mode)
+            probe(compiled)
+        except Exception as e:
+            logger.warning("torch.compile failed, training eagerly: %s", e)
+            return model
+
+        if self.is_main:
+            logger.info("Compiled model with mode=%s, first steps include compilation", mode)
+        return compiled
 
     def _generate_synthetic_data(
             self,
             num_samples: int,
-            sequence_length: int = 10
+            sequence_length: int = 10,
+            seed: Optional[int] = None
     ):
         """Generate synthetic training data"""
-        X = []
-        y = []
-
-        for _ in range(num_samples):
-            # Simulate network conditions
-            latency = np.random.uniform(10, 200)
-            jitter = np.random.uniform(0, 50)
-            loss = np.random.uniform(0, 0.1)
-            bandwidth = np.random.uniform(5000, 50000)
-
-            # Create sequence
-            sequence = np.zeros((sequence_length, 10))
-            for t in range(sequence_length):
-                sequence[t] = [
-                    latency / 200.0 + np.random.randn() * 0.1,
-                    jitter / 50.0 + np.random.randn() * 0.1,
-                    loss + np.random.randn() * 0.01,
-                    bandwidth / 50000.0 + np.random.randn() * 0.1,
-                    0.5,  # complexity
-                    0.5,  # mean latency
-                    0.1,  # std latency
-                    0.5,  # mean jitter
-                    loss,  # mean loss
-                    0.5,  # current bitrate
-                ]
-
-            # Target bitrate (simple heuristic)
-            target = (bandwidth / 50000.0) * (1 - loss * 2) * (1 - latency / 400.0)
-            target = np.clip(target, 0.1, 1.0)
-
-            X.append(sequence)
-            y.append(target)
-
-        return np.array(X), np.array(y)
\ No newline at end of file
+        rng = np.random.default_rng(seed)
+        N, T = num_samples, sequence_length
+
+        # Simulate network conditions, one draw per sequence
+        latency = rng.uniform(10, 200, N)[:, None]
+        jitter = rng.uniform(0, 50, N)[:, None]
+        loss = rng.uniform(0, 0.1, N)[:, None]
+        bandwidth = rng.uniform(5000, 50000, N)[:, None]
+
+        # Create sequences with per-timestep noise, (N, T, 10)
+        constant = np.ones((N, T))
+        X = np.stack([
+            latency / 200.0 + rng.standard_normal((N, T)) * 0.1,
+            jitter / 50.0 + rng.standard_normal((N, T)) * 0.1,
+            loss + rng.standard_normal((N, T)) * 0.01,
+            bandwidth / 50000.0 + rng.standard_normal((N, T)) * 0.1,
+            constant * 0.5,  # complexity
+            constant * 0.5,  # mean latency
+            constant * 0.1,  # std latency
+            constant * 0.5,  # mean jitter
+            constant * loss,  # mean loss
+            constant * 0.5,  # current bitrate
+        ], axis=-1)
+
+        # Target bitrate (simple heuristic)
+        y = (bandwidth / 50000.0) * (1 - loss * 2) * (1 - latency / 400.0)
+        y = np.clip(y, 0.1, 1.0).ravel()
+
+        return X.astype(np.float32), y.astype(np.float32)
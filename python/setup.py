@@ -5,10 +5,18 @@ setup(
     version="0.1.0",
     packages=find_packages(),
     install_requires=[
-        "torch>=2.1.0",
         "numpy>=1.24.0",
         "pandas>=2.0.0",
         "websockets>=11.0",
+        "msgspec>=0.18.0",
+        "uvloop>=0.19.0; sys_platform != 'win32'",
     ],
+    # torch comes from the PyTorch index so the CUDA build is picked
+    # explicitly, e.g. pip install -e ".[cuda121]" --extra-index-url
+    # https://download.pytorch.org/whl/cu121
+    extras_require={
+        "cuda121": ["torch==2.4.0+cu121"],
+        "cpu": ["torch==2.4.0+cpu"],
+    },
     python_requires=">=3.9",
 )
\ No newline at end of file
@@ -3,9 +3,12 @@ Offline training script for ML models
 """
 import argparse
 import logging
-from pathlib import Path
+import os
+import random
+import sys
 
-from optimizer.trainer import Trainer
+# torch and the trainer are imported once arguments parse, so --help and
+# bad flags don't pay for CUDA initialization
 
 logging.basicConfig(
     level=logging.INFO,
@@ -13,14 +16,107 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Tuned combination applied by --fast, explicitly passed flags still win.
+# cuDNN autotuning, TF32 and persistent workers are already on outside
+# --deterministic.
+FAST_PRESET = dict(
+    precision='bf16',
+    compile=True,
+    compile_mode='reduce-overhead',
+    pin_memory=True,
+    num_workers=(os.cpu_count() or 2) // 2,
+    prefetch_factor=4,
+    optimizer='adamw',
+)
 
-def main():
+# Emoji only when a person is watching, plain text for log files/CI
+_ICONS = sys.stderr.isatty()
+
+
+def _icon(symbol: str) -> str:
+    return f"{symbol} " if _ICONS else ""
+
+
+def init_distributed():
+    """
+    Join the process group when launched by torchrun
+
+    Returns:
+        (rank, local_rank, world_size), (0, 0, 1) for a single process
+    """
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    if world_size <= 1:
+        return 0, 0, 1
+
+    import torch
+    import torch.distributed as dist
+
+    rank = int(os.environ['RANK'])
+    local_rank = int(os.environ['LOCAL_RANK'])
+
+    # gloo serves CPU tensors so --cpu also works on GPU hosts
+    if torch.cuda.is_available():
+        torch.cuda.set_device(local_rank)
+        backend = 'cpu:gloo,cuda:nccl'
+    else:
+        backend = 'gloo'
+
+    dist.init_process_group(backend=backend, init_method='env://')
+
+    # Only rank 0 reports progress
+    if rank != 0:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    return rank, local_rank, world_size
+
+
+def seed_everything(seed: int):
+    """Seed every RNG training draws from"""
+    import numpy as np
+    import torch
+
+    # Inherited by spawned DataLoader workers
+    os.environ['PYTHONHASHSEED'] = str(seed)
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+    torch.cuda.manual_seed_all(seed)
+
+
+def configure_backends(deterministic: bool):
+    """Pick cuDNN algorithm selection and enable TF32 matmuls"""
+    import torch
+
+    torch.backends.cudnn.enabled = True
+    if deterministic:
+        # cuBLAS needs a fixed workspace to reduce in a stable order
+        os.environ.setdefault('CUBLAS_WORKSPACE_CONFIG', ':4096:8')
+        torch.backends.cudnn.benchmark = False
+        torch.backends.cudnn.deterministic = True
+    else:
+        # Autotune algorithms once, batch shapes are fixed
+        torch.backends.cudnn.benchmark = True
+        torch.backends.cudnn.deterministic = False
+    torch.use_deterministic_algorithms(deterministic)
+
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision('high')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Command line options"""
     parser = argparse.ArgumentParser(description='Train ML models')
     parser.add_argument(
         '--dataset',
         required=True,
         help='Path to training dataset'
     )
+    parser.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='Convert the dataset again instead of using its cache'
+    )
     parser.add_argument(
         '--models-dir',
         default='models',
@@ -44,27 +140,253 @@ def main():
         default=0.001,
         help='Learning rate'
     )
+    parser.add_argument(
+        '--optimizer',
+        choices=['adam', 'adamw', 'sgd'],
+        default='adam',
+        help='Optimizer, uses fused CUDA kernels when available'
+    )
+    parser.add_argument(
+        '--accum-steps',
+        type=int,
+        default=1,
+        help='Micro-batches accumulated per optimizer step'
+    )
+    parser.add_argument(
+        '--jit-steps',
+        type=int,
+        default=0,
+        help='Capture this many training steps into one CUDA graph, 0 disables'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Record a torch.profiler trace of the first training steps'
+    )
+    parser.add_argument(
+        '--profile-steps',
+        type=int,
+        default=5,
+        help='Steps recorded by --profile'
+    )
+    parser.add_argument(
+        '--profile-out',
+        default='profiles',
+        help='Directory for --profile traces (TensorBoard/Chrome format)'
+    )
+    parser.add_argument(
+        '--cpu',
+        action='store_true',
+        help='Train on CPU instead of requiring a CUDA GPU'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=1337,
+        help='Seed for weight init, shuffling and synthetic data'
+    )
+    reproducibility = parser.add_mutually_exclusive_group()
+    reproducibility.add_argument(
+        '--deterministic',
+        action='store_true',
+        help='Bit-reproducible runs, slower: deterministic algorithms only '
+             'and no cuDNN autotuning'
+    )
+    reproducibility.add_argument(
+        '--fast',
+        action='store_true',
+        help='Tuned preset: bf16, torch.compile (reduce-overhead), pinned '
+             'memory, worker prefetching and fused AdamW'
+    )
+    parser.add_argument(
+        '--compile',
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help='Compile the model with torch.compile'
+    )
+    parser.add_argument(
+        '--compile-mode',
+        choices=['default', 'reduce-overhead', 'max-autotune'],
+        default='reduce-overhead',
+        help='torch.compile mode'
+    )
+    parser.add_argument(
+        '--precision',
+        choices=['fp32', 'tf32', 'bf16', 'fp16'],
+        default='bf16',
+        help='Training precision on GPU (bf16/fp16 use autocast)'
+    )
+    parser.add_argument(
+        '--num-workers',
+        type=int,
+        default=(os.cpu_count() or 2) // 2,
+        help='DataLoader worker processes'
+    )
+    parser.add_argument(
+        '--pin-memory',
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help='Pin batches in page-locked memory (default: on with CUDA)'
+    )
+    parser.add_argument(
+        '--prefetch-factor',
+        type=int,
+        default=4,
+        help='Batches each DataLoader worker loads ahead'
+    )
+    parser.add_argument(
+        '--pinned-staging',
+        action='store_true',
+        help='Reuse persistent pinned buffers for host-to-device copies'
+    )
+    parser.add_argument(
+        '--prefetch-depth',
+        type=int,
+        default=2,
+        help='Batches prefetched to the GPU on a background thread (0 disables)'
+    )
+    parser.add_argument(
+        '--channels-last',
+        action=argparse.BooleanOptionalAction,
+        default=None,
+        help='Use NHWC memory format (default: on when the model has Conv2d layers)'
+    )
+    parser.add_argument(
+        '--export-int8',
+        action='store_true',
+        help='After training, also save TorchScript fp32 and INT8 bitrate models'
+    )
+    parser.add_argument(
+        '--log-level',
+        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+        default='INFO',
+        help='Logging verbosity, WARNING hides per-epoch progress'
+    )
+    return parser
+
 
+def parse_args() -> argparse.Namespace:
+    """Parse the command line, with --fast swapping in the preset defaults"""
+    parser = build_parser()
     args = parser.parse_args()
+    if args.fast:
+        parser.set_defaults(**FAST_PRESET)
+        args = parser.parse_args()
+    return args
 
-    logger.info("🧠 Starting model training")
-    logger.info(f"   Dataset: {args.dataset}")
-    logger.info(f"   Models dir: {args.models_dir}")
-    logger.info(f"   Epochs: {args.epochs}")
-    logger.info("")
 
-    # Create trainer
-    trainer = Trainer(models_dir=args.models_dir)
+def share_args(args, world_size: int):
+    """Broadcast rank 0's parsed arguments, None when parsing exited"""
+    if world_size <= 1:
+        return args
+
+    import torch.distributed as dist
+
+    shared = [args]
+    dist.broadcast_object_list(shared, src=0)
+    return shared[0]
+
+
+def main():
+    # Only rank 0 parses the command line, before anything imports torch
+    rank = int(os.environ.get('RANK', 0))
+    world_size = int(os.environ.get('WORLD_SIZE', 1))
+    args = None
+    if rank == 0:
+        try:
+            args = parse_args()
+        except SystemExit:
+            # Release the other ranks instead of leaving them blocked on
+            # the broadcast
+            if world_size > 1:
+                init_distributed()
+                share_args(None, world_size)
+            raise
+
+    rank, local_rank, world_size = init_distributed()
+    args = share_args(args, world_size)
+    if args is None:
+        sys.exit(2)
+
+    import torch
+    import torch.distributed as dist
+
+    from optimizer.trainer import Trainer
+
+    level = getattr(logging, args.log_level)
+    if rank != 0:
+        level = max(level, logging.WARNING)
+    logging.getLogger().setLevel(level)
+
+    # A CPU-only torch build silently trains far slower, fail loudly instead
+    if not args.cpu and not torch.cuda.is_available():
+        sys.exit(
+            f"CUDA is not available (torch {torch.__version__}, "
+            f"CUDA {torch.version.cuda}). Install a CUDA build of torch "
+            f"or pass --cpu"
+        )
 
-    # Train bitrate predictor
-    trainer.train_bitrate_predictor(
-        dataset_path=args.dataset,
-        epochs=args.epochs,
-        batch_size=args.batch_size,
-        learning_rate=args.learning_rate
+    if rank == 0:
+        logger.info("%sStarting model training", _icon("🧠"))
+        logger.info("   Dataset: %s", args.dataset)
+        logger.info("   Models dir: %s", args.models_dir)
+        logger.info("   Epochs: %d", args.epochs)
+        if world_size > 1:
+            logger.info("   Ranks: %d", world_size)
+        if not args.cpu:
+            logger.info("   Torch: %s, CUDA %s, cuDNN %s", torch.__version__,
+                        torch.version.cuda, torch.backends.cudnn.version())
+            logger.info("   Device: %s", torch.cuda.get_device_name(local_rank))
+        # Full effective configuration, so runs can be compared later
+        logger.info("   Config: %s", " ".join(
+            f"{key}={value}" for key, value in sorted(vars(args).items())
+        ))
+        logger.info("")
+
+    configure_backends(args.deterministic and not args.fast)
+    seed_everything(args.seed)
+
+    # Create trainer
+    trainer = Trainer(
+        models_dir=args.models_dir,
+        rank=rank,
+        world_size=world_size,
+        local_rank=local_rank,
+        use_cuda=not args.cpu,
+        seed=args.seed
     )
 
-    logger.info("✅ Training complete!")
+    try:
+        # Train bitrate predictor
+        trainer.train_bitrate_predictor(
+            dataset_path=args.dataset,
+            epochs=args.epochs,
+            batch_size=args.batch_size,
+            learning_rate=args.learning_rate,
+            optimizer_name=args.optimizer,
+            compile_model=args.compile,
+            compile_mode=args.compile_mode,
+            precision=args.precision,
+            num_workers=args.num_workers,
+            pin_memory=args.pin_memory,
+            prefetch_factor=args.prefetch_factor,
+            pinned_staging=args.pinned_staging,
+            prefetch_depth=args.prefetch_depth,
+            channels_last=args.channels_last,
+            accum_steps=args.accum_steps,
+            jit_steps=args.jit_steps,
+            profile_steps=args.profile_steps if args.profile else 0,
+            profile_dir=args.profile_out,
+            rebuild_cache=args.rebuild_cache
+        )
+
+        if args.export_int8:
+            trainer.export_bitrate_predictor()
+    finally:
+        if dist.is_initialized():
+            dist.destroy_process_group()
+
+    logger.info("%sTraining complete!", _icon("✅"))
 
 
 if __name__ == '__main__':